@@ -0,0 +1,268 @@
+# mqtt_async_client.py
+#
+# Opis:
+#   Asyncio klijent za slanje komandi na Dw200RoomCtrl uređaje i čekanje
+#   njihovih odgovora. Koristi istu logiku slanja kao mqtt_publisher.py, ali se
+#   jednom pretplati na teme odgovora i svaku komandu označi jedinstvenim
+#   'serialNo'. Uređaj taj 'serialNo' vraća u odgovoru na temu
+#   access_device/v1/cmd/{command}_reply, pa se odgovor uparuje sa komandom.
+#
+# Primjer korištenja iz koda:
+#
+#    async with CommandClient("localhost") as client:
+#        replies = await asyncio.gather(
+#            *(client.request(sn, "getConfig", "doorInfo") for sn in serijski_brojevi),
+#            return_exceptions=True)
+#
+# Primjer korištenja iz komandne linije:
+#    python mqtt_async_client.py --sn D200-12345678 --sn D200-87654321 --command getConfig --data "\"doorInfo\""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+
+import paho.mqtt.client as mqtt
+
+from mqtt_publisher import build_payload, cmd_topic, create_client
+
+# Uređaj odgovara na temu komande bez SN-a sa sufiksom '_reply'
+REPLY_TOPIC = "access_device/v1/cmd/+"
+
+# Kod uspješnog odgovora uređaja (mqttService.CODE.S_000)
+CODE_SUCCESS = "000000"
+
+
+class CommandTimeout(asyncio.TimeoutError):
+    """Uređaj nije odgovorio na komandu u zadanom vremenu."""
+
+    def __init__(self, sn, command, timeout):
+        super().__init__(f"{sn}/{command}: nema odgovora nakon {timeout} s")
+        self.sn = sn
+        self.command = command
+        self.timeout = timeout
+
+
+class Reply:
+    """Odgovor uređaja na jednu komandu."""
+
+    __slots__ = ("sn", "command", "serial_no", "code", "data", "latency")
+
+    def __init__(self, sn, command, serial_no, code, data, latency):
+        self.sn = sn
+        self.command = command
+        self.serial_no = serial_no
+        self.code = code
+        self.data = data
+        self.latency = latency
+
+    @property
+    def ok(self):
+        return self.code == CODE_SUCCESS
+
+    def __repr__(self):
+        return f"Reply(sn={self.sn!r}, command={self.command!r}, code={self.code!r}, latency={self.latency:.3f})"
+
+
+class _Pending:
+    __slots__ = ("sn", "command", "future", "sent_at", "timer")
+
+    def __init__(self, sn, command, future, sent_at, timer):
+        self.sn = sn
+        self.command = command
+        self.future = future
+        self.sent_at = sent_at
+        self.timer = timer
+
+
+class CommandClient:
+    """
+    Asyncio klijent za komande i odgovore uređaja preko jedne MQTT konekcije.
+
+    Mrežna petlja paho klijenta radi u vlastitoj niti, a odgovori se predaju
+    event loop-u preko call_soon_threadsafe. Svaka komanda je jedan Future sa
+    vlastitim tajmerom, pa hiljade istovremenih komandi ne troše po jedan task.
+    """
+
+    def __init__(self, broker="localhost", port=1883, username=None, password=None,
+                 client_id=None, qos=1, max_inflight=1000):
+        self.broker = broker
+        self.port = port
+        self.username = username
+        self.password = password
+        self.qos = qos
+        self._client = create_client(client_id or f"server_side_async_{uuid.uuid4().hex[:8]}")
+        self._client.max_inflight_messages_set(max_inflight)
+        self._client.max_queued_messages_set(0)
+        self._client.on_connect = self._on_connect
+        self._client.on_message = self._on_message
+        self._loop = None
+        self._connected = None
+        self._pending = {}  # serialNo -> _Pending
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @property
+    def outstanding(self):
+        """Broj komandi koje još čekaju odgovor."""
+        return len(self._pending)
+
+    async def connect(self, timeout=10.0):
+        """Spaja se na broker i pretplaćuje na teme odgovora."""
+        self._loop = asyncio.get_running_loop()
+        self._connected = self._loop.create_future()
+        if self.username and self.password:
+            self._client.username_pw_set(self.username, self.password)
+        await self._loop.run_in_executor(None, self._client.connect, self.broker, self.port, 60)
+        self._client.loop_start()
+        try:
+            await asyncio.wait_for(self._connected, timeout)
+        except Exception:
+            self._client.loop_stop()
+            raise
+
+    async def close(self):
+        """Prekida konekciju; komande bez odgovora završavaju sa CancelledError."""
+        for pending in self._pending.values():
+            pending.timer.cancel()
+            if not pending.future.done():
+                pending.future.cancel()
+        self._pending.clear()
+        if self._loop is None:
+            # connect() nije ni pozvan, nema mrežne petlje za zaustaviti
+            return
+        self._client.disconnect()
+        await self._loop.run_in_executor(None, self._client.loop_stop)
+
+    def send(self, sn, command, data=None, timeout=10.0):
+        """
+        Šalje komandu i odmah vraća Future koji se razriješi sa Reply objektom.
+
+        Ako odgovor ne stigne u 'timeout' sekundi, Future završava sa CommandTimeout,
+        a ako paho odbije slanje, odmah završava sa ConnectionError.
+        """
+        serial_no = uuid.uuid4().hex
+        future = self._loop.create_future()
+        timer = self._loop.call_later(timeout, self._expire, serial_no, timeout)
+        self._pending[serial_no] = _Pending(sn, command, future, time.monotonic(), timer)
+        payload = build_payload(sn, {"data": data} if data is not None else {}, serial_no=serial_no)
+        info = self._client.publish(cmd_topic(sn, command), payload, qos=self.qos)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            self._pending.pop(serial_no, None)
+            timer.cancel()
+            future.set_exception(ConnectionError(f"{sn}/{command}: slanje nije uspjelo: {mqtt.error_string(info.rc)}"))
+        return future
+
+    async def request(self, sn, command, data=None, timeout=10.0):
+        """Šalje komandu i čeka odgovor uređaja."""
+        return await self.send(sn, command, data, timeout)
+
+    # --- Callback funkcije (pozivaju se iz niti paho klijenta) ---
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            client.subscribe(REPLY_TOPIC, qos=self.qos)
+        self._loop.call_soon_threadsafe(self._set_connected, rc)
+
+    def _on_message(self, client, userdata, message):
+        received_at = time.monotonic()
+        try:
+            payload = json.loads(message.payload)
+            serial_no = payload["serialNo"]
+        except (ValueError, KeyError, TypeError):
+            return
+        self._loop.call_soon_threadsafe(self._resolve, serial_no, payload, received_at)
+
+    # --- Metode koje se izvršavaju u event loop-u ---
+    def _set_connected(self, rc):
+        if self._connected.done():
+            return
+        if rc == 0:
+            self._connected.set_result(True)
+        else:
+            self._connected.set_exception(ConnectionError(f"Neuspješno spajanje, kod greške: {rc}"))
+
+    def _resolve(self, serial_no, payload, received_at):
+        pending = self._pending.get(serial_no)
+        if pending is None or payload.get("uuid", pending.sn) != pending.sn:
+            return
+        del self._pending[serial_no]
+        pending.timer.cancel()
+        if not pending.future.done():
+            pending.future.set_result(Reply(pending.sn, pending.command, serial_no, payload.get("code"),
+                                            payload.get("data"), received_at - pending.sent_at))
+
+    def _expire(self, serial_no, timeout):
+        pending = self._pending.pop(serial_no, None)
+        if pending is not None and not pending.future.done():
+            pending.future.set_exception(CommandTimeout(pending.sn, pending.command, timeout))
+
+
+def percentile(values, fraction):
+    """Vraća percentil (0.0 - 1.0) iz liste vrijednosti."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def _run(args):
+    sns = list(args.sn)
+    if args.sn_file:
+        with open(args.sn_file, 'r', encoding='utf-8') as f:
+            sns.extend(line.strip() for line in f if line.strip())
+    if not sns:
+        print("Greška: nije zadan nijedan uređaj (--sn ili --sn-file)")
+        return 1
+    data = json.loads(args.data) if args.data is not None else None
+
+    async with CommandClient(args.broker, args.port, args.username, args.password) as client:
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *(client.request(sn, args.command, data, args.timeout) for sn in sns),
+            return_exceptions=True)
+        elapsed = time.monotonic() - start
+
+    latencies = []
+    failed = 0
+    for sn, result in zip(sns, results):
+        if isinstance(result, Reply):
+            latencies.append(result.latency)
+            status = "OK" if result.ok else f"GREŠKA (kod {result.code})"
+            failed += 0 if result.ok else 1
+            print(f"{sn}: {status} {result.latency * 1000:.1f} ms")
+        else:
+            failed += 1
+            print(f"{sn}: GREŠKA ({result})")
+
+    print(f"\nOdgovorilo {len(latencies)}/{len(sns)} uređaja za {elapsed:.2f} s, "
+          f"latencija p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+          f"max {max(latencies, default=0.0) * 1000:.1f} ms")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slanje komande na više uređaja uz čekanje odgovora")
+    parser.add_argument('--broker', type=str, default="localhost", help="Adresa MQTT brokera (default: localhost)")
+    parser.add_argument('--port', type=int, default=1883, help="Port MQTT brokera (default: 1883)")
+    parser.add_argument('--username', type=str, default=None, help="Korisničko ime za MQTT brokera")
+    parser.add_argument('--password', type=str, default=None, help="Lozinka za MQTT brokera")
+    parser.add_argument('--sn', type=str, action='append', default=[], help="Serijski broj uređaja (može se ponoviti)")
+    parser.add_argument('--sn-file', type=str, default=None, help="Datoteka sa serijskim brojevima, jedan po redu")
+    parser.add_argument('--command', type=str, required=True, help="Naziv komande, npr. getConfig")
+    parser.add_argument('--data', type=str, default=None, help="JSON vrijednost polja 'data'")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Vrijeme čekanja odgovora po komandi u sekundama (default: 10)")
+    args = parser.parse_args(argv)
+    sys.exit(asyncio.run(_run(args)))
+
+
+if __name__ == '__main__':
+    main()
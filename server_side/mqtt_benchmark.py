@@ -0,0 +1,307 @@
+# mqtt_benchmark.py
+#
+# Opis:
+#   Benchmark komandnog puta prema uređajima. Simulira N virtuelnih D200 uređaja
+#   sa stvarnim rasporedom tema: svaki uređaj šalje 'connect' pri pokretanju,
+#   periodični 'heartbeat' i 'access' događaje, i odgovara na komande sa
+#   access_device/v1/cmd/{sn}/{command} na temu access_device/v1/cmd/{command}_reply.
+#   Komande se šalju zadanim tempom preko CommandClient-a, a mjeri se latencija
+#   (p50/p95/p99), propusnost i zaostatak poruka na brokeru.
+#
+#   Bez --broker koristi se lokalni broker unutar procesa (mqtt_local_broker.py),
+#   pa benchmark radi potpuno offline. Rezultat se može sačuvati kao JSON i
+#   uporediti sa prethodnim rezultatom radi otkrivanja regresija.
+#
+# Primjeri korištenja:
+#    python mqtt_benchmark.py --devices 500 --rate 1000 --duration 10 --output rezultat.json
+#    python mqtt_benchmark.py --broker localhost --devices 100 --rate 200
+#    python mqtt_benchmark.py --devices 500 --rate 1000 --compare rezultat.json
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import threading
+import time
+
+from mqtt_async_client import CommandClient, Reply, percentile
+from mqtt_local_broker import LocalBroker
+from mqtt_publisher import connect_client, create_client
+
+EVENT_TOPIC = "access_device/v1/event/{sn}/{event}"
+
+
+def _device_message(sn, serial_no, data, code="000000"):
+    """Poruka u formatu mqttService.mqttReply na uređaju."""
+    return json.dumps({"serialNo": serial_no, "uuid": sn, "sign": "", "code": code,
+                       "data": data, "time": int(time.time())})
+
+
+class VirtualFleet:
+    """
+    Skup virtuelnih uređaja raspoređenih na nekoliko MQTT konekcija.
+
+    Svaka konekcija opslužuje dio serijskih brojeva, pa se i stotine uređaja
+    simuliraju bez stotina niti.
+    """
+
+    def __init__(self, broker, port, devices, connections=4, heartbeat_interval=30.0,
+                 access_rate=0.0, sn_prefix="D200-BENCH", subscribe_timeout=10.0):
+        self.broker = broker
+        self.port = port
+        self.sns = [f"{sn_prefix}{index:05d}" for index in range(devices)]
+        self.heartbeat_interval = heartbeat_interval
+        self.access_rate = access_rate
+        self.subscribe_timeout = subscribe_timeout
+        self.commands_handled = 0
+        self.events_sent = 0
+        self._clients = []
+        self._stop = threading.Event()
+        self._thread = None
+        connections = max(1, min(connections, devices))
+        self._groups = [self.sns[index::connections] for index in range(connections)]
+
+    def start(self):
+        for index, group in enumerate(self._groups):
+            client = create_client(f"bench_fleet_{index}")
+            hosted = set(group)
+
+            def on_message(client, userdata, message, hosted=hosted):
+                parts = message.topic.split("/")
+                if len(parts) != 5 or parts[3] not in hosted:
+                    return
+                try:
+                    payload = json.loads(message.payload)
+                except ValueError:
+                    return
+                self.commands_handled += 1
+                client.publish(f"access_device/v1/cmd/{parts[4]}_reply",
+                               _device_message(parts[3], payload.get("serialNo"), payload.get("data")))
+
+            subscribed = threading.Event()
+            granted = []
+
+            def on_subscribe(client, userdata, mid, granted_qos, subscribed=subscribed, granted=granted):
+                granted.extend(granted_qos)
+                subscribed.set()
+
+            client.on_message = on_message
+            client.on_subscribe = on_subscribe
+            client.max_inflight_messages_set(1000)
+            if not connect_client(client, self.broker, self.port):
+                raise ConnectionError(f"Virtuelni uređaji se ne mogu spojiti na {self.broker}:{self.port}")
+            # Svaka konekcija se pretplaćuje samo na teme svojih uređaja. Komande se
+            # počinju slati tek nakon SUBACK-a, inače bi se prve izgubile kao istekle.
+            client.subscribe([(f"access_device/v1/cmd/{sn}/+", 0) for sn in group])
+            if not subscribed.wait(self.subscribe_timeout) or 128 in granted:
+                client.loop_stop()
+                client.disconnect()
+                raise ConnectionError(f"Broker {self.broker}:{self.port} nije potvrdio pretplatu virtuelnih uređaja")
+            for sn in group:
+                client.publish(EVENT_TOPIC.format(sn=sn, event="connect"),
+                               _device_message(sn, f"connect_{sn}", {"appVersion": "bench"}))
+                self.events_sent += 1
+            self._clients.append((client, group))
+        self._thread = threading.Thread(target=self._events_loop, name="virtual-fleet", daemon=True)
+        self._thread.start()
+
+    def _events_loop(self):
+        next_heartbeat = time.monotonic() + self.heartbeat_interval
+        access_interval = 1.0 / self.access_rate if self.access_rate else None
+        next_access = time.monotonic() + (access_interval or 0)
+        device = 0
+        while not self._stop.wait(0.01):
+            now = time.monotonic()
+            if now >= next_heartbeat:
+                next_heartbeat = now + self.heartbeat_interval
+                for client, group in self._clients:
+                    for sn in group:
+                        client.publish(EVENT_TOPIC.format(sn=sn, event="heartbeat"),
+                                       _device_message(sn, f"hb_{sn}", None))
+                        self.events_sent += 1
+            while access_interval and now >= next_access:
+                next_access += access_interval
+                client, group = self._clients[device % len(self._clients)]
+                sn = group[(device // len(self._clients)) % len(group)]
+                device += 1
+                record = [{"type": 100, "code": "BENCH", "result": 0, "time": int(time.time())}]
+                client.publish(EVENT_TOPIC.format(sn=sn, event="access"),
+                               _device_message(sn, f"acc_{device}", record))
+                self.events_sent += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        for client, _ in self._clients:
+            client.loop_stop()
+            client.disconnect()
+
+
+async def drive_commands(client, sns, rate, duration, command, timeout):
+    """
+    Šalje komande ravnomjernim tempom ('rate' u sekundi) tokom 'duration' sekundi.
+
+    Vraća (latencije, broj grešaka, broj isteklih, trajanje, maksimalan broj komandi u letu).
+    """
+    total = max(1, int(rate * duration))
+    futures = []
+    peak_outstanding = 0
+    start = time.monotonic()
+    for index in range(total):
+        delay = start + index / rate - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        futures.append(client.send(sns[index % len(sns)], command, {"bench": index}, timeout))
+        peak_outstanding = max(peak_outstanding, client.outstanding)
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    elapsed = time.monotonic() - start
+
+    latencies = []
+    errors = 0
+    timeouts = 0
+    for result in results:
+        if isinstance(result, Reply):
+            if result.ok:
+                latencies.append(result.latency)
+            else:
+                errors += 1
+        elif isinstance(result, asyncio.TimeoutError):
+            timeouts += 1
+        else:
+            errors += 1
+    return latencies, errors, timeouts, elapsed, peak_outstanding
+
+
+async def run_benchmark(broker, port, devices, rate, duration, command="getConfig", timeout=10.0,
+                        connections=4, heartbeat_interval=30.0, access_rate=0.0, local_broker=None):
+    """Pokreće virtuelne uređaje i komande; vraća rječnik sa rezultatima."""
+    fleet = VirtualFleet(broker, port, devices, connections, heartbeat_interval, access_rate)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, fleet.start)
+    try:
+        async with CommandClient(broker, port) as client:
+            latencies, errors, timeouts, elapsed, peak = await drive_commands(
+                client, fleet.sns, rate, duration, command, timeout)
+    finally:
+        await loop.run_in_executor(None, fleet.stop)
+
+    sent = max(1, int(rate * duration))
+    return {
+        "config": {
+            "broker": "in-process" if local_broker is not None else f"{broker}:{port}",
+            "devices": devices,
+            "rate": rate,
+            "duration": duration,
+            "command": command,
+            "connections": connections,
+            "heartbeat_interval": heartbeat_interval,
+            "access_rate": access_rate,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "commands_sent": sent,
+        "replies": len(latencies),
+        "errors": errors,
+        "timeouts": timeouts,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(max(latencies, default=0.0) * 1000, 3),
+        },
+        "client_peak_outstanding": peak,
+        "device_events_sent": fleet.events_sent,
+        "broker": None if local_broker is None else {
+            "messages_in": local_broker.messages_in,
+            "messages_out": local_broker.messages_out,
+            "max_backlog": local_broker.max_backlog,
+        },
+    }
+
+
+def compare_results(current, baseline, tolerance):
+    """
+    Poredi rezultat sa prethodnim; vraća listu regresija (prazna ako ih nema).
+
+    Regresija je p95/p99 latencija veća ili propusnost manja od prethodne za
+    više od 'tolerance' (npr. 0.2 = 20%).
+    """
+    regressions = []
+    for key in ("p95", "p99"):
+        old = baseline["latency_ms"][key]
+        new = current["latency_ms"][key]
+        if old and new > old * (1 + tolerance):
+            regressions.append(f"latencija {key}: {old} ms -> {new} ms")
+    old = baseline["throughput_per_s"]
+    new = current["throughput_per_s"]
+    if old and new < old * (1 - tolerance):
+        regressions.append(f"propusnost: {old}/s -> {new}/s")
+    return regressions
+
+
+def print_results(results):
+    latency = results["latency_ms"]
+    print(f"\nKomandi: {results['commands_sent']}, odgovora: {results['replies']}, "
+          f"grešaka: {results['errors']}, isteklo: {results['timeouts']}")
+    print(f"Propusnost: {results['throughput_per_s']} odgovora/s za {results['elapsed_s']} s")
+    print(f"Latencija: p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+          f"p99 {latency['p99']} ms, max {latency['max']} ms")
+    print(f"Najviše komandi u letu: {results['client_peak_outstanding']}")
+    if results["broker"] is not None:
+        print(f"Broker: primljeno {results['broker']['messages_in']}, isporučeno "
+              f"{results['broker']['messages_out']}, najveći zaostatak {results['broker']['max_backlog']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark komandnog puta sa virtuelnim D200 uređajima")
+    parser.add_argument('--broker', type=str, default=None, help="Adresa MQTT brokera (default: lokalni broker unutar procesa)")
+    parser.add_argument('--port', type=int, default=1883, help="Port MQTT brokera (default: 1883)")
+    parser.add_argument('--devices', type=int, default=100, help="Broj virtuelnih uređaja (default: 100)")
+    parser.add_argument('--connections', type=int, default=4, help="Broj MQTT konekcija za virtuelne uređaje (default: 4)")
+    parser.add_argument('--rate', type=float, default=500.0, help="Broj komandi u sekundi (default: 500)")
+    parser.add_argument('--duration', type=float, default=5.0, help="Trajanje slanja u sekundama (default: 5)")
+    parser.add_argument('--command', type=str, default="getConfig", help="Komanda koja se šalje (default: getConfig)")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Vrijeme čekanja odgovora po komandi (default: 10)")
+    parser.add_argument('--heartbeat-interval', type=float, default=30.0, help="Interval heartbeat poruka uređaja u sekundama (default: 30)")
+    parser.add_argument('--access-rate', type=float, default=0.0, help="Ukupan broj access događaja u sekundi (default: 0)")
+    parser.add_argument('--output', type=str, default=None, help="Sačuvaj rezultat u JSON datoteku")
+    parser.add_argument('--compare', type=str, default=None, help="Uporedi sa prethodnim JSON rezultatom")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Dozvoljeno pogoršanje pri poređenju (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    local_broker = None
+    broker, port = args.broker, args.port
+    if broker is None:
+        local_broker = LocalBroker().start_in_thread()
+        broker, port = local_broker.host, local_broker.port
+    try:
+        results = asyncio.run(run_benchmark(
+            broker, port, args.devices, args.rate, args.duration, args.command, args.timeout,
+            args.connections, args.heartbeat_interval, args.access_rate, local_broker))
+    finally:
+        if local_broker is not None:
+            local_broker.stop_in_thread()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Rezultat sačuvan u {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESIJA u odnosu na " + args.compare + ":")
+            for regression in regressions:
+                print(f"    {regression}")
+            sys.exit(1)
+        print(f"\nBez regresije u odnosu na {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+# mqtt_local_broker.py
+#
+# Opis:
+#   Minimalni MQTT 3.1.1 broker koji radi unutar Python procesa (asyncio).
+#   Služi za testiranje i benchmark serverske strane bez Mosquitto instalacije.
+#   Podržava CONNECT, PUBLISH (QoS 0/1/2 od klijenta), SUBSCRIBE sa '+' i '#'
+#   filterima, UNSUBSCRIBE, PINGREQ i DISCONNECT. Pretplatnicima se poruke
+#   isporučuju sa QoS 0, a retained poruke i sesije se ne čuvaju.
+#
+# Primjer pokretanja:
+#    python mqtt_local_broker.py --port 1883
+
+import argparse
+import asyncio
+import struct
+import threading
+
+# Tipovi MQTT paketa
+CONNECT = 1
+CONNACK = 2
+PUBLISH = 3
+PUBACK = 4
+PUBREC = 5
+PUBREL = 6
+PUBCOMP = 7
+SUBSCRIBE = 8
+SUBACK = 9
+UNSUBSCRIBE = 10
+UNSUBACK = 11
+PINGREQ = 12
+PINGRESP = 13
+DISCONNECT = 14
+
+
+def topic_matches(topic_filter, topic):
+    """Provjerava da li tema odgovara filteru pretplate ('+' i '#')."""
+    filter_parts = topic_filter.split("/")
+    topic_parts = topic.split("/")
+    for index, part in enumerate(filter_parts):
+        if part == "#":
+            return True
+        if index >= len(topic_parts):
+            return False
+        if part != "+" and part != topic_parts[index]:
+            return False
+    return len(filter_parts) == len(topic_parts)
+
+
+def _encode_length(length):
+    """Kodira 'remaining length' polje MQTT paketa."""
+    out = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        if length:
+            byte |= 0x80
+        out.append(byte)
+        if not length:
+            return bytes(out)
+
+
+def _packet(packet_type, flags, body):
+    return bytes([(packet_type << 4) | flags]) + _encode_length(len(body)) + body
+
+
+class _Session:
+    """Jedna konekcija klijenta sa vlastitim redom odlaznih paketa."""
+
+    def __init__(self, broker, reader, writer):
+        self.broker = broker
+        self.reader = reader
+        self.writer = writer
+        self.client_id = None
+        self.subscriptions = set()
+        self.outgoing = asyncio.Queue()
+
+    def backlog(self):
+        """Broj paketa koji čekaju slanje prema ovom klijentu."""
+        transport = self.writer.transport
+        buffered = transport.get_write_buffer_size() if transport is not None else 0
+        return self.outgoing.qsize() + (1 if buffered else 0)
+
+    async def _read_packet(self):
+        header = await self.reader.readexactly(1)
+        multiplier = 1
+        length = 0
+        while True:
+            byte = (await self.reader.readexactly(1))[0]
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+        body = await self.reader.readexactly(length) if length else b""
+        return header[0] >> 4, header[0] & 0x0F, body
+
+    async def _writer_loop(self):
+        while True:
+            data = await self.outgoing.get()
+            if data is None:
+                return
+            self.writer.write(data)
+            if self.outgoing.empty():
+                await self.writer.drain()
+
+    def send(self, data):
+        self.outgoing.put_nowait(data)
+
+    async def run(self):
+        writer_task = asyncio.ensure_future(self._writer_loop())
+        try:
+            while True:
+                packet_type, flags, body = await self._read_packet()
+                if packet_type == CONNECT:
+                    self._handle_connect(body)
+                elif packet_type == PUBLISH:
+                    self._handle_publish(flags, body)
+                elif packet_type == PUBREL:
+                    self.send(_packet(PUBCOMP, 0, body[:2]))
+                elif packet_type == SUBSCRIBE:
+                    self._handle_subscribe(body)
+                elif packet_type == UNSUBSCRIBE:
+                    self._handle_unsubscribe(body)
+                elif packet_type == PINGREQ:
+                    self.send(_packet(PINGRESP, 0, b""))
+                elif packet_type == DISCONNECT:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.broker.sessions.discard(self)
+            self.broker.routes.clear()
+            self.outgoing.put_nowait(None)
+            try:
+                await writer_task
+            except ConnectionError:
+                pass
+            self.writer.close()
+
+    def _handle_connect(self, body):
+        # Preskačemo ime protokola, nivo, zastavice i keep-alive
+        name_length = struct.unpack("!H", body[:2])[0]
+        offset = 2 + name_length + 4
+        id_length = struct.unpack("!H", body[offset:offset + 2])[0]
+        self.client_id = body[offset + 2:offset + 2 + id_length].decode("utf-8", "replace")
+        self.send(_packet(CONNACK, 0, b"\x00\x00"))
+
+    def _handle_publish(self, flags, body):
+        qos = (flags >> 1) & 0x03
+        topic_length = struct.unpack("!H", body[:2])[0]
+        topic = body[2:2 + topic_length].decode("utf-8")
+        offset = 2 + topic_length
+        if qos:
+            packet_id = body[offset:offset + 2]
+            offset += 2
+            self.send(_packet(PUBACK if qos == 1 else PUBREC, 0, packet_id))
+        self.broker.route(topic, body[offset:])
+
+    def _handle_subscribe(self, body):
+        packet_id = body[:2]
+        offset = 2
+        granted = bytearray()
+        while offset < len(body):
+            length = struct.unpack("!H", body[offset:offset + 2])[0]
+            self.subscriptions.add(body[offset + 2:offset + 2 + length].decode("utf-8"))
+            offset += 2 + length + 1
+            granted.append(0)
+        self.broker.routes.clear()
+        self.send(_packet(SUBACK, 0, packet_id + bytes(granted)))
+
+    def _handle_unsubscribe(self, body):
+        packet_id = body[:2]
+        offset = 2
+        while offset < len(body):
+            length = struct.unpack("!H", body[offset:offset + 2])[0]
+            self.subscriptions.discard(body[offset + 2:offset + 2 + length].decode("utf-8"))
+            offset += 2 + length
+        self.broker.routes.clear()
+        self.send(_packet(UNSUBACK, 0, packet_id))
+
+
+class LocalBroker:
+    """
+    MQTT broker unutar procesa.
+
+    Koristi se iz asyncio koda (await start()/stop()) ili iz običnog koda
+    preko start_in_thread()/stop_in_thread(). Port 0 bira slobodan port.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self.sessions = set()
+        self.routes = {}  # tema -> pretplatnici; briše se pri svakoj promjeni pretplata
+        self.messages_in = 0
+        self.messages_out = 0
+        self.max_backlog = 0
+        self._server = None
+        self._session_tasks = set()
+        self._loop = None
+        self._thread = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._on_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        for session in list(self.sessions):
+            session.writer.close()
+        # Zatvorena konekcija prekida čitanje, pa se sesije same završavaju
+        if self._session_tasks:
+            await asyncio.gather(*self._session_tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _on_client(self, reader, writer):
+        session = _Session(self, reader, writer)
+        self.sessions.add(session)
+        task = asyncio.current_task()
+        self._session_tasks.add(task)
+        try:
+            await session.run()
+        finally:
+            self._session_tasks.discard(task)
+
+    def route(self, topic, payload):
+        """Prosljeđuje poruku svim pretplatnicima čiji filter odgovara temi."""
+        self.messages_in += 1
+        subscribers = self.routes.get(topic)
+        if subscribers is None:
+            subscribers = [session for session in self.sessions
+                           if any(topic_matches(f, topic) for f in session.subscriptions)]
+            if len(self.routes) >= 100000:
+                self.routes.clear()
+            self.routes[topic] = subscribers
+        if subscribers:
+            encoded = topic.encode("utf-8")
+            data = _packet(PUBLISH, 0, struct.pack("!H", len(encoded)) + encoded + payload)
+            for session in subscribers:
+                session.send(data)
+            self.messages_out += len(subscribers)
+        backlog = self.backlog()
+        if backlog > self.max_backlog:
+            self.max_backlog = backlog
+
+    def backlog(self):
+        """Ukupan broj paketa koji čekaju isporuku klijentima."""
+        return sum(session.backlog() for session in self.sessions)
+
+    def start_in_thread(self):
+        """Pokreće broker u pozadinskoj niti i vraća se kada je spreman."""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            # Otkazujemo zadatke koji su eventualno preostali prije zatvaranja
+            # petlje, kao što to radi asyncio.run
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="mqtt-local-broker", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_in_thread(self):
+        """Zaustavlja broker pokrenut sa start_in_thread()."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokalni MQTT broker za testiranje")
+    parser.add_argument('--host', type=str, default="127.0.0.1", help="Adresa na kojoj broker sluša (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=1883, help="Port brokera (default: 1883)")
+    args = parser.parse_args()
+
+    async def serve():
+        broker = await LocalBroker(args.host, args.port).start()
+        print(f"Lokalni MQTT broker sluša na {broker.host}:{broker.port}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
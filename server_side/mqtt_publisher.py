@@ -3,6 +3,7 @@
 # Opis:
 #   Ova skripta šalje jednu MQTT poruku na određenu temu (topic) i izlazi.
 #   Koristi se za slanje komandi na Dw200RoomCtrl uređaj sa računara.
+#   Sa opcijom --batch šalje više komandi na više uređaja preko jedne konekcije.
 #
 # Primjeri korištenja iz komandne linije:
 #
@@ -14,75 +15,315 @@
 #
 # 3. Mijenjanje konfiguracije:
 #    python mqtt_publisher.py --topic "access_device/v1/cmd/D200-12345678/setConfig" --payload "{\"data\":{\"doorInfo\":{\"openTimeout\":10}}}"
+#
+# 4. Slanje komandi na cijelu flotu (JSON Lines ili CSV, '-' čita sa stdin):
+#    python mqtt_publisher.py --batch komande.jsonl --max-inflight 200
+#
+#    Svaki red u JSON Lines datoteci:
+#      {"sn": "D200-12345678", "command": "setConfig", "payload": {"data": {"doorInfo": {"openTimeout": 10}}}}
+#    CSV datoteka mora imati zaglavlje: sn,command,payload
 
 import argparse
-import paho.mqtt.client as mqtt
-import time
+import csv
+import io
+import json
 import sys
+import threading
+import time
+import uuid
+
+import paho.mqtt.client as mqtt
+
+# Šablon teme na koju uređaj sluša komande
+CMD_TOPIC = "access_device/v1/cmd/{sn}/{command}"
+
 
 # --- Argumenti komandne linije ---
-parser = argparse.ArgumentParser(description="Python MQTT Publisher")
-parser.add_argument('--broker', type=str, default="localhost", help="Adresa MQTT brokera (default: localhost)")
-parser.add_argument('--port', type=int, default=1883, help="Port MQTT brokera (default: 1883)")
-parser.add_argument('--topic', type=str, required=True, help="MQTT tema na koju se šalje poruka")
-parser.add_argument('--payload', type=str, required=True, help="Sadržaj poruke (payload) u obliku stringa")
-parser.add_argument('--username', type=str, default=None, help="Korisničko ime za MQTT brokera")
-parser.add_argument('--password', type=str, default=None, help="Lozinka za MQTT brokera")
-args = parser.parse_args()
-
-# --- MQTT Callback funkcije ---
-def on_connect(client, userdata, flags, rc):
-    """Callback koji se poziva prilikom spajanja na broker."""
-    if rc == 0:
-        print(f"Uspješno spojen na MQTT Broker: {args.broker}:{args.port}")
+def parse_args(argv=None):
+    """Parsira argumente komandne linije."""
+    parser = argparse.ArgumentParser(description="Python MQTT Publisher")
+    parser.add_argument('--broker', type=str, default="localhost", help="Adresa MQTT brokera (default: localhost)")
+    parser.add_argument('--port', type=int, default=1883, help="Port MQTT brokera (default: 1883)")
+    parser.add_argument('--topic', type=str, default=None, help="MQTT tema na koju se šalje poruka")
+    parser.add_argument('--payload', type=str, default=None, help="Sadržaj poruke (payload) u obliku stringa")
+    parser.add_argument('--username', type=str, default=None, help="Korisničko ime za MQTT brokera")
+    parser.add_argument('--password', type=str, default=None, help="Lozinka za MQTT brokera")
+    parser.add_argument('--client-id', type=str, default="server_side_tester_py", help="MQTT client ID (default: server_side_tester_py)")
+    # Opcije za slanje na više uređaja
+    parser.add_argument('--batch', type=str, default=None, help="Datoteka sa komandama (JSON Lines ili CSV), '-' za stdin")
+    parser.add_argument('--format', type=str, choices=["jsonl", "csv"], default=None, help="Format batch datoteke (default: prema ekstenziji, inače jsonl)")
+    parser.add_argument('--qos', type=int, choices=[0, 1, 2], default=1, help="QoS za batch poruke (default: 1)")
+    parser.add_argument('--max-inflight', type=int, default=100, help="Maksimalan broj nepotvrđenih poruka u letu (default: 100)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Maksimalno čekanje na potvrde u sekundama (default: 30)")
+    args = parser.parse_args(argv)
+    if args.batch is None and (args.topic is None or args.payload is None):
+        parser.error("--topic i --payload su obavezni ako se ne koristi --batch")
+    return args
+
+
+# --- Pomoćne funkcije ---
+def create_client(client_id):
+    """Kreira MQTT klijenta sa callback API-jem verzije 1 (radi i na paho-mqtt 1.x i 2.x)."""
+    if hasattr(mqtt, "CallbackAPIVersion"):
+        return mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, client_id=client_id)
+    return mqtt.Client(client_id=client_id)
+
+
+def cmd_topic(sn, command):
+    """Vraća temu komande za uređaj."""
+    return CMD_TOPIC.format(sn=sn, command=command)
+
+
+def build_payload(sn, payload, serial_no=None):
+    """
+    Priprema payload za uređaj.
+
+    Uređaj odbacuje poruke čiji 'uuid' nije jednak njegovom SN-u, pa se 'uuid'
+    dodaje ako nedostaje. 'serialNo' se vraća u odgovoru uređaja i služi za
+    uparivanje komande sa odgovorom. Payload koji nije JSON objekat šalje se
+    nepromijenjen.
+    """
+    if isinstance(payload, str):
+        try:
+            parsed = json.loads(payload)
+        except ValueError:
+            return payload
+        if not isinstance(parsed, dict):
+            return payload
+        payload = parsed
+    payload = dict(payload)
+    payload.setdefault("uuid", sn)
+    if serial_no is not None:
+        payload["serialNo"] = serial_no
     else:
-        print(f"Neuspješno spajanje, kod greške: {rc}\nProvjerite da li je Mosquitto pokrenut ('mosquitto -v') i da li je adresa brokera tačna.")
-        sys.exit(1) # Prekini izvršavanje ako konekcija nije uspjela
+        payload.setdefault("serialNo", uuid.uuid4().hex)
+    return json.dumps(payload, separators=(",", ":"))
 
-def on_publish(client, userdata, mid):
-    """Callback koji se poziva nakon slanja poruke."""
-    print(f"Poruka poslana na temu: {args.topic}")
-    print(f"Sadržaj: {args.payload}")
 
-# --- Glavna logika ---
-def main():
-    """Glavna funkcija za spajanje, slanje i odspajanje."""
-    client = mqtt.Client(client_id="server_side_tester_py")
+def load_records(source, fmt=None):
+    """
+    Učitava listu komandi (sn, command, payload) iz datoteke ili sa stdin ('-').
 
-    # Postavljanje callback funkcija
-    client.on_connect = on_connect
-    client.on_publish = on_publish
+    Vraća listu rječnika sa ključevima 'sn', 'command' i 'payload'.
+    """
+    if fmt is None:
+        fmt = "csv" if source.lower().endswith(".csv") else "jsonl"
+    if source == "-":
+        text = sys.stdin.read()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+    records = []
+    if fmt == "csv":
+        rows = csv.DictReader(io.StringIO(text))
+        for line_no, row in enumerate(rows, start=2):
+            records.append(_check_record(row, line_no))
+    else:
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Red {line_no}: neispravan JSON ({e})")
+            records.append(_check_record(row, line_no))
+    return records
+
+
+def _check_record(row, line_no):
+    """Provjerava da zapis ima sva obavezna polja."""
+    if not isinstance(row, dict):
+        raise ValueError(f"Red {line_no}: zapis mora biti objekat")
+    missing = [key for key in ("sn", "command", "payload") if row.get(key) in (None, "")]
+    if missing:
+        raise ValueError(f"Red {line_no}: nedostaju polja {', '.join(missing)}")
+    return {"sn": str(row["sn"]), "command": str(row["command"]), "payload": row["payload"]}
 
-    # Postavljanje korisničkog imena i lozinke ako su prosljeđeni
-    if args.username and args.password:
-        client.username_pw_set(args.username, args.password)
 
+def connect_client(client, broker, port, username=None, password=None, timeout=10.0):
+    """
+    Spaja klijenta na broker, pokreće mrežnu petlju i čeka CONNACK.
+
+    Vraća True ako je konekcija uspostavljena.
+    """
+    connected = threading.Event()
+    result = {}
+
+    def on_connect(client, userdata, flags, rc):
+        result["rc"] = rc
+        connected.set()
+
+    client.on_connect = on_connect
+    if username and password:
+        client.username_pw_set(username, password)
     try:
-        # Pokušaj spajanja
-        client.connect(args.broker, args.port, 60)
+        client.connect(broker, port, 60)
     except Exception as e:
         print(f"Greška prilikom spajanja na MQTT broker: {e}")
         print("Provjerite da li je Mosquitto pokrenut i da li je adresa tačna.")
-        sys.exit(1)
-
-    # Dajemo vremena da se konekcija uspostavi i poruka pošalje
+        return False
     client.loop_start()
+    if not connected.wait(timeout) or result.get("rc") != 0:
+        print(f"Neuspješno spajanje, kod greške: {result.get('rc', 'timeout')}")
+        client.loop_stop()
+        return False
+    print(f"Uspješno spojen na MQTT Broker: {broker}:{port}")
+    return True
+
+
+def publish_batch(client, records, qos=1, timeout=30.0):
+    """
+    Šalje sve komande preko već spojenog klijenta i čeka potvrde (PUBACK/PUBCOMP).
+
+    Funkcija se vraća čim stigne posljednja potvrda ili kada istekne 'timeout'.
+    Vraća listu rezultata (po jedan za svaki zapis) sa ključevima 'sn', 'command',
+    'topic', 'ok' i 'error'.
+    """
+    lock = threading.Lock()
+    done = threading.Event()
+    pending = {}      # mid -> indeks zapisa
+    early_acks = set()  # potvrde koje su stigle prije nego što je mid registrovan
+    results = []
+    remaining = [0]
+
+    def finish(index):
+        results[index]["ok"] = True
+        results[index]["error"] = None
+        remaining[0] -= 1
+        if remaining[0] == 0:
+            done.set()
+
+    def on_publish(client, userdata, mid):
+        with lock:
+            index = pending.pop(mid, None)
+            if index is None:
+                early_acks.add(mid)
+            else:
+                finish(index)
+
+    client.on_publish = on_publish
+
+    for record in records:
+        topic = cmd_topic(record["sn"], record["command"])
+        results.append({"sn": record["sn"], "command": record["command"], "topic": topic, "ok": False, "error": "bez potvrde"})
+
+    with lock:
+        remaining[0] = len(records)
+    if not records:
+        return results
+
+    for index, record in enumerate(records):
+        payload = build_payload(record["sn"], record["payload"])
+        info = client.publish(results[index]["topic"], payload, qos=qos)
+        with lock:
+            if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                results[index]["error"] = mqtt.error_string(info.rc)
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+            elif info.mid in early_acks:
+                early_acks.discard(info.mid)
+                finish(index)
+            else:
+                pending[info.mid] = index
+
+    done.wait(timeout)
+    return results
+
+
+def print_report(results, elapsed):
+    """Ispisuje rezultat slanja po uređaju i ukupnu propusnost."""
+    per_device = {}
+    for result in results:
+        stats = per_device.setdefault(result["sn"], {"ok": 0, "failed": []})
+        if result["ok"]:
+            stats["ok"] += 1
+        else:
+            stats["failed"].append(result)
+
+    print("\n--- Rezultat po uređaju ---")
+    for sn in sorted(per_device):
+        stats = per_device[sn]
+        status = "OK" if not stats["failed"] else "GREŠKA"
+        print(f"{sn}: {status} (uspješno: {stats['ok']}, neuspješno: {len(stats['failed'])})")
+        for result in stats["failed"]:
+            print(f"    {result['command']}: {result['error']}")
+
+    sent = sum(1 for result in results if result["ok"])
+    rate = sent / elapsed if elapsed > 0 else 0.0
+    failed_devices = sum(1 for stats in per_device.values() if stats["failed"])
+    print(f"\nPoslano: {sent}/{len(results)} poruka na {len(per_device)} uređaja "
+          f"({failed_devices} sa greškom) za {elapsed:.2f} s ({rate:.1f} poruka/s)")
+
+
+# --- Glavna logika ---
+def run_single(args):
+    """Spajanje, slanje jedne poruke i odspajanje."""
+    client = create_client(args.client_id)
+
+    def on_publish(client, userdata, mid):
+        """Callback koji se poziva nakon slanja poruke."""
+        print(f"Poruka poslana na temu: {args.topic}")
+        print(f"Sadržaj: {args.payload}")
+
+    client.on_publish = on_publish
+
+    if not connect_client(client, args.broker, args.port, args.username, args.password):
+        sys.exit(1)
 
     # Slanje poruke
     result = client.publish(args.topic, args.payload)
-    
+
     # Čekamo da se poruka objavi
-    status = result.wait_for_publish()
-    if not status:
+    result.wait_for_publish()
+    if not result.is_published():
         print("Greška: Poruka nije uspješno poslana.")
 
-    # Dajemo mali delay da se on_publish callback izvrši
-    time.sleep(1)
-
     # Prekidamo petlju i odspajamo se
     client.loop_stop()
     client.disconnect()
     print("Diskonektovan sa MQTT Brokera.")
 
+
+def run_batch(args):
+    """Slanje svih komandi iz batch datoteke preko jedne konekcije."""
+    try:
+        records = load_records(args.batch, args.format)
+    except (OSError, ValueError) as e:
+        print(f"Greška prilikom čitanja batch datoteke: {e}")
+        sys.exit(1)
+    print(f"Učitano {len(records)} komandi")
+
+    client = create_client(args.client_id)
+    client.max_inflight_messages_set(args.max_inflight)
+    client.max_queued_messages_set(0)  # bez ograničenja reda čekanja
+
+    if not connect_client(client, args.broker, args.port, args.username, args.password):
+        sys.exit(1)
+
+    start = time.monotonic()
+    results = publish_batch(client, records, qos=args.qos, timeout=args.timeout)
+    elapsed = time.monotonic() - start
+
+    client.loop_stop()
+    client.disconnect()
+    print("Diskonektovan sa MQTT Brokera.")
+
+    print_report(results, elapsed)
+    if not all(result["ok"] for result in results):
+        sys.exit(1)
+
+
+def main(argv=None):
+    """Glavna funkcija."""
+    args = parse_args(argv)
+    if args.batch is not None:
+        run_batch(args)
+    else:
+        run_single(args)
+
+
 if __name__ == '__main__':
     main()
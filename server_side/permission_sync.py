@@ -0,0 +1,289 @@
+# permission_sync.py
+#
+# Opis:
+#   Sinhronizacija ovlaštenja (QR kodovi, kartice, PIN) sa više uređaja.
+#   Za svaki uređaj se željeni skup ovlaštenja poredi sa posljednjim poznatim
+#   stanjem koje se čuva lokalno u SQLite bazi. Šalju se samo razlike:
+#   nova i izmijenjena ovlaštenja preko 'insertPermission' (uređaj radi upsert
+#   po 'id'), a uklonjena preko 'delPermission'. Razlike se dijele u dijelove
+#   ograničene veličine, a slanje je ograničeno brojem dijelova u letu po
+#   uređaju i ukupnim brojem poruka u sekundi prema brokeru. Lokalno stanje se
+#   ažurira tek kada uređaj potvrdi dio uspješnim odgovorom.
+#
+# Format ulazne datoteke (JSON):
+#    {"D200-12345678": [{"id": "g1", "type": 100, "code": "PROBA123", "time": {"type": 0}, "extra": {}}, ...], ...}
+# ili JSON Lines, jedan uređaj po redu:
+#    {"sn": "D200-12345678", "permissions": [...]}
+#
+# Primjer korištenja:
+#    python permission_sync.py --input hotel.json --max-inflight 4 --rate 200
+#    python permission_sync.py --input hotel.json --dry-run
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from mqtt_async_client import CommandClient
+
+DEFAULT_STATE_PATH = Path(__file__).parent / "permission_state.db"
+
+
+# --- Lokalno stanje ---
+class PermissionState:
+    """Posljednje poznato stanje ovlaštenja po uređaju (sn, id -> hash zapisa)."""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.conn = sqlite3.connect(str(path))
+        # WAL i NORMAL sinhronizacija: potvrda svakog dijela ne čeka fsync
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS permission_state ("
+            " sn TEXT NOT NULL, id TEXT NOT NULL, hash TEXT NOT NULL,"
+            " PRIMARY KEY (sn, id)) WITHOUT ROWID")
+        self.conn.commit()
+
+    def load(self, sn):
+        """Vraća rječnik {id: hash} za uređaj."""
+        rows = self.conn.execute("SELECT id, hash FROM permission_state WHERE sn = ?", (sn,))
+        return dict(rows)
+
+    def apply(self, sn, inserted=(), deleted=()):
+        """Bilježi potvrđene izmjene: 'inserted' je lista (id, hash), 'deleted' lista id-ova."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO permission_state (sn, id, hash) VALUES (?, ?, ?)",
+                ((sn, permission_id, digest) for permission_id, digest in inserted))
+            self.conn.executemany(
+                "DELETE FROM permission_state WHERE sn = ? AND id = ?",
+                ((sn, permission_id) for permission_id in deleted))
+
+    def forget(self, sn):
+        """Briše poznato stanje uređaja (sljedeća sinhronizacija šalje sve)."""
+        with self.conn:
+            self.conn.execute("DELETE FROM permission_state WHERE sn = ?", (sn,))
+
+    def close(self):
+        self.conn.close()
+
+
+def encode_record(record):
+    """
+    Vraća (hash, veličina) zapisa ovlaštenja.
+
+    Hash ne zavisi od redoslijeda ključeva, a veličina je dužina zapisa u
+    kompaktnom JSON-u kakav se šalje uređaju, pa se zapis kodira samo jednom.
+    """
+    canonical = json.dumps(record, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha1(canonical).hexdigest(), len(canonical)
+
+
+def compute_delta(desired, known):
+    """
+    Poredi željena ovlaštenja sa poznatim stanjem.
+
+    'desired' je lista zapisa sa poljem 'id', 'known' rječnik {id: hash}.
+    Vraća (inserts, deletes): inserts je lista (zapis, hash, veličina) za nova
+    i izmijenjena ovlaštenja, deletes lista id-ova koji više nisu željeni.
+    """
+    inserts = []
+    desired_ids = set()
+    for record in desired:
+        permission_id = str(record["id"])
+        desired_ids.add(permission_id)
+        digest, size = encode_record(record)
+        if known.get(permission_id) != digest:
+            inserts.append((record, digest, size))
+    deletes = [permission_id for permission_id in known if permission_id not in desired_ids]
+    return inserts, deletes
+
+
+def chunk_items(items, max_bytes, max_items, size_of=lambda item: len(json.dumps(item))):
+    """
+    Dijeli listu u dijelove čiji JSON ne prelazi 'max_bytes' i koji nemaju
+    više od 'max_items' elemenata. Element veći od 'max_bytes' ide sam u dio.
+    """
+    chunk = []
+    size = 2  # zagrade liste
+    for item in items:
+        item_size = size_of(item) + 1  # zarez
+        if chunk and (size + item_size > max_bytes or len(chunk) >= max_items):
+            yield chunk
+            chunk = []
+            size = 2
+        chunk.append(item)
+        size += item_size
+    if chunk:
+        yield chunk
+
+
+class RateLimiter:
+    """Ograničava ukupan broj poruka u sekundi (ravnomjerno raspoređeno)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# --- Sinhronizacija ---
+def plan_device(sn, desired, state, max_bytes, max_items):
+    """Vraća listu dijelova za uređaj: ('insertPermission'|'delPermission', podaci, stavke za stanje)."""
+    inserts, deletes = compute_delta(desired, state.load(sn))
+    chunks = []
+    for chunk in chunk_items(deletes, max_bytes, max_items):
+        chunks.append(("delPermission", chunk, chunk))
+    for chunk in chunk_items(inserts, max_bytes, max_items, size_of=lambda item: item[2]):
+        records = [record for record, _, _ in chunk]
+        chunks.append(("insertPermission", records, [(str(record["id"]), digest) for record, digest, _ in chunk]))
+    return chunks
+
+
+async def sync_device(client, sn, chunks, state, limiter, max_inflight, timeout):
+    """Šalje dijelove jednom uređaju; vraća statistiku sinhronizacije."""
+    stats = {"inserted": 0, "deleted": 0, "chunks": len(chunks), "failed": 0, "errors": []}
+    semaphore = asyncio.Semaphore(max_inflight)
+
+    async def send_chunk(command, data, items):
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                reply = await client.request(sn, command, data, timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Isteklo vrijeme ili paho nije prihvatio poruku (npr. tokom ponovnog
+                # spajanja); ostali dijelovi i uređaji se nastavljaju slati.
+                stats["failed"] += 1
+                stats["errors"].append(str(e) or f"{command}: {type(e).__name__}")
+                return
+            if not reply.ok:
+                stats["failed"] += 1
+                stats["errors"].append(f"{command}: kod {reply.code} {reply.data}")
+                return
+            if command == "delPermission":
+                state.apply(sn, deleted=items)
+                stats["deleted"] += len(items)
+            else:
+                state.apply(sn, inserted=items)
+                stats["inserted"] += len(items)
+
+    await asyncio.gather(*(send_chunk(*chunk) for chunk in chunks))
+    return stats
+
+
+async def sync_all(client, desired_by_sn, state, max_bytes=16384, max_items=200,
+                   max_inflight=4, rate=None, timeout=30.0):
+    """Sinhronizuje sve uređaje; vraća rječnik {sn: statistika}."""
+    limiter = RateLimiter(rate)
+    plans = {sn: plan_device(sn, desired, state, max_bytes, max_items)
+             for sn, desired in desired_by_sn.items()}
+    results = await asyncio.gather(*(
+        sync_device(client, sn, chunks, state, limiter, max_inflight, timeout)
+        for sn, chunks in plans.items()))
+    return dict(zip(plans, results))
+
+
+def load_desired(path):
+    """Učitava željena ovlaštenja: {sn: [zapisi]} iz JSON ili JSON Lines datoteke."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if str(path).lower().endswith(".jsonl"):
+        desired = {}
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if "sn" not in row or not isinstance(row.get("permissions"), list):
+                raise ValueError(f"Red {line_no}: potrebna su polja 'sn' i 'permissions'")
+            desired.setdefault(str(row["sn"]), []).extend(row["permissions"])
+    else:
+        desired = json.loads(text)
+        if not isinstance(desired, dict):
+            raise ValueError("JSON datoteka mora biti objekat {sn: [ovlaštenja]}")
+    for sn, records in desired.items():
+        for record in records:
+            if not isinstance(record, dict) or record.get("id") in (None, ""):
+                raise ValueError(f"{sn}: svako ovlaštenje mora imati 'id'")
+    return desired
+
+
+async def _run(args):
+    try:
+        desired = load_desired(args.input)
+    except (OSError, ValueError) as e:
+        print(f"Greška prilikom čitanja ulazne datoteke: {e}")
+        return 1
+    state = PermissionState(args.state)
+    try:
+        if args.reset:
+            for sn in desired:
+                state.forget(sn)
+
+        if args.dry_run:
+            for sn, records in sorted(desired.items()):
+                chunks = plan_device(sn, records, state, args.max_bytes, args.max_items)
+                inserts = sum(len(data) for command, data, _ in chunks if command == "insertPermission")
+                deletes = sum(len(data) for command, data, _ in chunks if command == "delPermission")
+                print(f"{sn}: dodati/izmijeniti {inserts}, obrisati {deletes} ({len(chunks)} poruka)")
+            return 0
+
+        async with CommandClient(args.broker, args.port, args.username, args.password) as client:
+            start = time.monotonic()
+            results = await sync_all(client, desired, state, args.max_bytes, args.max_items,
+                                     args.max_inflight, args.rate, args.timeout)
+            elapsed = time.monotonic() - start
+    finally:
+        state.close()
+
+    failed = 0
+    messages = 0
+    for sn in sorted(results):
+        stats = results[sn]
+        messages += stats["chunks"]
+        failed += 1 if stats["failed"] else 0
+        status = "OK" if not stats["failed"] else "GREŠKA"
+        print(f"{sn}: {status} (dodano {stats['inserted']}, obrisano {stats['deleted']}, "
+              f"poruka {stats['chunks']}, neuspješno {stats['failed']})")
+        for error in stats["errors"]:
+            print(f"    {error}")
+    print(f"\nSinhronizovano {len(results) - failed}/{len(results)} uređaja, "
+          f"{messages} poruka za {elapsed:.2f} s")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sinhronizacija ovlaštenja sa uređajima (samo razlike)")
+    parser.add_argument('--broker', type=str, default="localhost", help="Adresa MQTT brokera (default: localhost)")
+    parser.add_argument('--port', type=int, default=1883, help="Port MQTT brokera (default: 1883)")
+    parser.add_argument('--username', type=str, default=None, help="Korisničko ime za MQTT brokera")
+    parser.add_argument('--password', type=str, default=None, help="Lozinka za MQTT brokera")
+    parser.add_argument('--input', type=str, required=True, help="Željena ovlaštenja po uređaju (JSON ili JSON Lines)")
+    parser.add_argument('--state', type=str, default=str(DEFAULT_STATE_PATH), help="SQLite baza sa posljednjim poznatim stanjem")
+    parser.add_argument('--max-bytes', type=int, default=16384, help="Maksimalna veličina podataka jedne poruke u bajtima (default: 16384)")
+    parser.add_argument('--max-items', type=int, default=200, help="Maksimalan broj ovlaštenja u jednoj poruci (default: 200)")
+    parser.add_argument('--max-inflight', type=int, default=4, help="Maksimalan broj poruka u letu po uređaju (default: 4)")
+    parser.add_argument('--rate', type=float, default=None, help="Maksimalan ukupan broj poruka u sekundi (default: bez ograničenja)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Vrijeme čekanja odgovora po poruci u sekundama (default: 30)")
+    parser.add_argument('--reset', action='store_true', help="Zaboravi poznato stanje uređaja i pošalji sva ovlaštenja")
+    parser.add_argument('--dry-run', action='store_true', help="Samo prikaži razlike, bez slanja")
+    args = parser.parse_args(argv)
+    sys.exit(asyncio.run(_run(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Tests for translate_chinese_comments.py (run with: python -m pytest test_translate_chinese_comments.py)"""
+
+import translate_chinese_comments as tcc
+
+SOURCE = """\
+// 初始化 客户端
+/**
+ * 发送消息
+ * @param {string} topic 主题 未知词
+ */
+function send(topic) {}
+"""
+
+
+class FailingBackend:
+    """Backend whose requests all fail, like Google Translate without network"""
+
+    def translate_batch(self, texts):
+        raise ConnectionError("network is unreachable")
+
+
+class EnglishBackend:
+    def translate_batch(self, texts):
+        return ["translated: " + tcc.CHINESE_RE.sub("word", text.strip()) for text in texts]
+
+
+def write_source(tmp_path, name="a.js"):
+    path = tmp_path / name
+    path.write_text(SOURCE, encoding="utf-8")
+    return path
+
+
+def test_offline_backend_process_file_and_manifest(tmp_path):
+    path = write_source(tmp_path)
+    memory = tcc.TranslationMemory(None)
+    fragments = tcc.collect_fragments(path)
+    assert tcc.translate_fragments(fragments, memory, "offline") == len(fragments)
+    assert memory.entries == {}
+
+    changes_made, _, content, pending = tcc.process_file(path, memory)
+    assert changes_made == 3
+    assert path.read_text(encoding="utf-8") == content
+    assert "// initialize client\n" in content
+    assert " * @param {string} topic topic 未知词\n" in content
+    assert pending
+
+    manifest = tcc.Manifest(tmp_path / "manifest.json")
+    manifest.record(path, content, pending, tcc.get_glossary())
+    manifest.save()
+    manifest = tcc.Manifest(tmp_path / "manifest.json")
+    assert manifest.unchanged(path)
+    assert manifest.pending(path, tcc.get_glossary()) == pending
+
+    # A second run leaves the file alone
+    changes_made, _, second, second_pending = tcc.process_file(path, memory)
+    assert changes_made == 0
+    assert second == content
+    assert second_pending == pending
+
+
+def test_translate_files_on_worker_processes(tmp_path):
+    paths = [write_source(tmp_path, f"{name}.js") for name in "abc"]
+    memory = tcc.TranslationMemory(tmp_path / "cache.json")
+    manifest = tcc.Manifest(tmp_path / "manifest.json")
+    assert tcc.translate_files(paths, memory, manifest, "offline", jobs=2) == 3
+    assert all("// initialize client\n" in path.read_text(encoding="utf-8") for path in paths)
+    assert tcc.translate_files(paths, memory, manifest, "offline", jobs=2) == 0
+
+
+def test_untranslated_file_retried_with_working_backend(tmp_path):
+    path = write_source(tmp_path)
+    memory = tcc.TranslationMemory(tmp_path / "cache.json")
+    manifest = tcc.Manifest(tmp_path / "manifest.json")
+    assert tcc.translate_files([path], memory, manifest, "offline", jobs=1) == 1
+    offline = path.read_text(encoding="utf-8")
+    assert "未知词" in offline
+
+    # Neither a failing backend nor a rerun touches the file
+    manifest = tcc.Manifest(tmp_path / "manifest.json")
+    backend = f"{__name__}:FailingBackend"
+    assert tcc.translate_files([path], memory, manifest, backend, jobs=1) == 0
+    assert path.read_text(encoding="utf-8") == offline
+
+    # The first run with a working backend translates what was left
+    manifest = tcc.Manifest(tmp_path / "manifest.json")
+    assert tcc.translate_files([path], memory, manifest, f"{__name__}:EnglishBackend", jobs=1) == 1
+    translated = path.read_text(encoding="utf-8")
+    assert not tcc.contains_chinese(translated)
+    assert " * translated: @param {string} topic topic word\n" in translated
+    assert tcc.Manifest(tmp_path / "manifest.json").pending(path, tcc.get_glossary()) == set()
@@ -5,22 +5,64 @@ Chinese to English Comment Translator for dxmodules
 This script automatically finds and translates all Chinese text in JavaScript comments
 within the dxmodules folder to English.
 
+Translations are kept in a persistent translation memory (a JSON file keyed
+by the hash of the source text), so a fragment is only ever sent to the
+translation backend once. Files are scanned on a pool of worker processes
+(--jobs), all missing fragments are de-duplicated and translated in batches
+on threads, and then the files are rewritten on the process pool.
+
+Technical terms are replaced from a glossary (MANUAL_TRANSLATIONS plus an
+optional JSON file of {"chinese": "english"} entries) in a single
+longest-match pass over each fragment.
+
+A manifest records the size, mtime and content hash of every processed
+file. Unchanged files cost one stat call; in changed files only comment
+lines whose translation differs from their current text are rewritten, and
+each of those is looked up in the translation memory by the hash of its
+text. For a file left with untranslated spans the manifest keeps those
+hashes; its fragments go to the backend again on every run, but the file is
+only rewritten once one of them has entered the translation memory or the
+glossary has changed. All files are written atomically.
+
 Usage:
-    python translate_chinese_comments.py
+    python translate_chinese_comments.py [--dry-run] [--backend google|offline|module:factory]
+                                         [--jobs N] [--batch-size N] [--cache PATH]
+                                         [--glossary PATH] [--manifest PATH] [--force]
+                                         [FILE ...]
+    python translate_chinese_comments.py --benchmark
+
+Backends:
+    google          Google Translate via deep-translator (default)
+    offline         No network access; only MANUAL_TRANSLATIONS and the cache are used
+    module:factory  Any importable callable returning an object with a
+                    translate_batch(texts) -> list method (e.g. a local model)
 
 Requirements:
-    pip install deep-translator
+    pip install deep-translator   (only for the google backend)
 """
 
-import re
+import argparse
+import hashlib
+import importlib
+import json
 import os
+import re
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from deep_translator import GoogleTranslator
 
 # Configuration
 DXMODULES_PATH = Path(__file__).parent / "dxmodules"
 BACKUP_SUFFIX = ".backup"
 DRY_RUN = False  # Set to True to see what would be changed without modifying files
+CACHE_PATH = Path(__file__).parent / ".translation_cache.json"
+GLOSSARY_PATH = Path(__file__).parent / "translation_glossary.json"  # optional, extends MANUAL_TRANSLATIONS
+MANIFEST_PATH = Path(__file__).parent / ".translation_manifest.json"
+BACKEND = "google"
+JOBS = os.cpu_count() or 4
+BATCH_SIZE = 50
 
 # Common Chinese-to-English translations (manual mapping for technical terms)
 MANUAL_TRANSLATIONS = {
@@ -110,142 +152,565 @@ MANUAL_TRANSLATIONS = {
 }
 
 
+CHINESE_RE = re.compile(r'[\u4e00-\u9fff]+')
+SINGLE_COMMENT_RE = re.compile(r'^(\s*)(//|/\*\*?|\*)(.*)$', re.MULTILINE)
+JSDOC_PARAM_RE = re.compile(
+    r'^(\s+\*\s*@)(param|returns?|brief|details|description)(\s+\{[^}]+\}\s+\w+)?\s+(.+)$',
+    re.MULTILINE
+)
+
+
 def contains_chinese(text):
     """Check if text contains Chinese characters"""
-    return bool(re.search(r'[\u4e00-\u9fff]+', text))
+    return CHINESE_RE.search(text) is not None
+
+
+def atomic_write(path, text):
+    """Write text to path via a temporary file and rename"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    if path.exists():
+        shutil.copymode(path, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class TranslationMemory:
+    """Persistent cache of backend translations keyed by a hash of the source text"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = Path(path) if path else None
+        self.entries = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable translation cache {self.path}: {e}")
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def get(self, text):
+        return self.entries.get(self.key(text))
+
+    def put(self, text, translation):
+        with self.lock:
+            self.entries[self.key(text)] = translation
+            self.dirty = True
+
+    def save(self):
+        """Write the cache atomically if it changed"""
+        if not self.path or not self.dirty:
+            return
+        atomic_write(self.path, json.dumps(self.entries, ensure_ascii=False, indent=0, sort_keys=True))
+        self.dirty = False
+
+
+class Manifest:
+    """Per-file record of the last processed state, used to skip unchanged work"""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = Path(path) if path else None
+        self.files = {}
+        self.dirty = False
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.files = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: ignoring unreadable manifest {self.path}: {e}")
+
+    @staticmethod
+    def key(file_path):
+        """Absolute path, so paths given relative to the working directory match"""
+        return str(Path(file_path).resolve())
+
+    def unchanged(self, file_path):
+        """True if the file has not changed since it was recorded
+
+        Files whose size and mtime match are recognised after a single stat
+        call. If only the mtime moved, the content hash decides.
+        """
+        entry = self.files.get(self.key(file_path))
+        if entry is None:
+            return False
+        stat = os.stat(file_path)
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if stat.st_size != entry["size"]:
+            return False
+        with open(file_path, 'rb') as f:
+            if hashlib.sha1(f.read()).hexdigest() != entry["sha1"]:
+                return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        self.dirty = True
+        return True
+
+    def pending(self, file_path, glossary):
+        """Memory keys of the spans an unchanged file was left with untranslated
+
+        Returns None if the file has to be processed again anyway because it
+        was recorded without its keys or with a different glossary.
+        """
+        entry = self.files[self.key(file_path)]
+        if entry.get("complete"):
+            return set()
+        if "pending" not in entry or entry.get("glossary") != glossary.digest:
+            return None
+        return set(entry["pending"])
+
+    def record(self, file_path, content, pending, glossary):
+        """Record a processed file and the memory keys of its untranslated spans"""
+        stat = os.stat(file_path)
+        self.files[self.key(file_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": hashlib.sha1(content.encode('utf-8')).hexdigest(),
+            "complete": not pending,
+            "pending": sorted(pending),
+            "glossary": glossary.digest,
+        }
+        self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        atomic_write(self.path, json.dumps(self.files, indent=0, sort_keys=True))
+        self.dirty = False
+
+
+class GoogleBackend:
+    """Google Translate via deep-translator"""
+
+    def __init__(self, source='zh-CN', target='en'):
+        from deep_translator import GoogleTranslator
+        self.translator = GoogleTranslator(source=source, target=target)
 
+    def translate_batch(self, texts):
+        return self.translator.translate_batch(list(texts))
 
-def translate_text(text):
-    """Translate Chinese text to English using manual mappings or Google Translate"""
+
+class OfflineBackend:
+    """Backend that never touches the network and leaves text untranslated"""
+
+    def translate_batch(self, texts):
+        return [None] * len(texts)
+
+
+def load_backend(spec):
+    """Create a translation backend from a name or a 'module:factory' spec"""
+    if spec == "google":
+        return GoogleBackend()
+    if spec == "offline":
+        return OfflineBackend()
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Unknown backend '{spec}' (use google, offline or module:factory)")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+class Glossary:
+    """Longest-match term replacement over a trie, in one left-to-right pass
+
+    At each position the longest glossary term wins, so a short key such as
+    "消息" can no longer break up a longer phrase such as "遗嘱消息".
+    """
+
+    _END = ""  # trie key marking the end of a term
+
+    def __init__(self, terms):
+        self.root = {}
+        self.first_chars = set()
+        self.digest = hashlib.sha1(json.dumps(terms, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+        for chinese, english in terms.items():
+            if not chinese:
+                continue
+            node = self.root
+            for char in chinese:
+                node = node.setdefault(char, {})
+            node[self._END] = english
+            self.first_chars.add(chinese[0])
+
+    def __len__(self):
+        return self._count(self.root)
+
+    def _count(self, node):
+        return sum(1 if key == self._END else self._count(child) for key, child in node.items())
+
+    def translate(self, text):
+        """Return (text with all terms replaced, whether Chinese is left)"""
+        out = []
+        chinese_left = False
+        first_chars = self.first_chars
+        end = self._END
+        i = 0
+        n = len(text)
+        while i < n:
+            char = text[i]
+            if char in first_chars:
+                node = self.root
+                match = None
+                j = i
+                while j < n:
+                    node = node.get(text[j])
+                    if node is None:
+                        break
+                    j += 1
+                    if end in node:
+                        match = (j, node[end])
+                if match is not None:
+                    out.append(match[1])
+                    i = match[0]
+                    continue
+            if not chinese_left and '\u4e00' <= char <= '\u9fff':
+                chinese_left = True
+            out.append(char)
+            i += 1
+        return "".join(out), chinese_left
+
+
+def load_glossary(path=GLOSSARY_PATH):
+    """Build the glossary from MANUAL_TRANSLATIONS and an optional JSON file"""
+    terms = dict(MANUAL_TRANSLATIONS)
+    if path and Path(path).exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            terms.update(json.load(f))
+    return Glossary(terms)
+
+
+GLOSSARY = None
+
+
+def get_glossary():
+    global GLOSSARY
+    if GLOSSARY is None:
+        GLOSSARY = load_glossary()
+    return GLOSSARY
+
+
+def apply_manual_translations(text):
+    """Replace known technical terms; returns (text, whether Chinese is left)"""
+    return get_glossary().translate(text)
+
+
+def translate_text(text, memory=None):
+    """Translate Chinese text to English using manual mappings and the translation memory"""
     if not contains_chinese(text):
         return text
-    
+
     # Try manual translation first
-    for chinese, english in MANUAL_TRANSLATIONS.items():
-        if chinese in text:
-            text = text.replace(chinese, english)
-    
-    # If still contains Chinese, use Google Translate
-    if contains_chinese(text):
+    text, chinese_left = apply_manual_translations(text)
+
+    # If still contains Chinese, use the translation memory filled by the backend
+    if memory is not None and chinese_left:
+        translated = memory.get(text)
+        if translated:
+            text = translated
+
+    return text
+
+
+def collect_fragments(file_path):
+    """Return the comment fragments of a file that still need a backend translation"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}")
+        return set()
+
+    fragments = set()
+    for match in SINGLE_COMMENT_RE.finditer(content):
+        comment_text = match.group(3)
+        if contains_chinese(comment_text):
+            text, chinese_left = apply_manual_translations(comment_text)
+            if chinese_left:
+                fragments.add(text)
+    return fragments
+
+
+def translate_fragments(fragments, memory, backend_spec=BACKEND, batch_size=BATCH_SIZE, jobs=JOBS):
+    """Translate fragments missing from the memory in batches; returns the number sent to the backend"""
+    missing = sorted(text for text in fragments if memory.get(text) is None)
+    if not missing:
+        return 0
+
+    backend = load_backend(backend_spec)
+    batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+    print(f"\nTranslating {len(missing)} new fragments in {len(batches)} batches")
+
+    def run_batch(batch):
         try:
-            translator = GoogleTranslator(source='zh-CN', target='en')
-            text = translator.translate(text)
+            results = backend.translate_batch(batch)
         except Exception as e:
             print(f"Translation error: {e}")
-    
-    return text
+            return
+        for text, translated in zip(batch, results):
+            if translated and translated != text:
+                memory.put(text, translated)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(batches)))) as pool:
+        list(pool.map(run_batch, batches))
+    return len(missing)
 
 
-def process_file(file_path):
-    """Process a single JavaScript file and translate Chinese comments"""
-    print(f"\nProcessing: {file_path}")
-    
+def process_file(file_path, memory=None, dry_run=DRY_RUN):
+    """Process a single JavaScript file and translate Chinese comments
+
+    Returns (changes_made, log_lines, content, pending) so files can be
+    processed in parallel, their output printed in a stable order and the
+    result recorded in the manifest. content is None if the file could not be
+    read; pending holds the translation memory keys of the comments that
+    still contain Chinese. A comment is only rewritten, and counted, if its
+    translation differs from its current text.
+    """
+    log = [f"\nProcessing: {file_path}"]
+
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
     except Exception as e:
-        print(f"Error reading {file_path}: {e}")
-        return
-    
+        log.append(f"Error reading {file_path}: {e}")
+        return 0, log, None, set()
+
     original_content = content
     changes_made = 0
-    
+    pending = set()
+
+    def translate_span(text):
+        """Translate one span, keeping its leading whitespace; remembers untranslated spans"""
+        translated = translate_text(text, memory)
+        if contains_chinese(translated):
+            pending.add(TranslationMemory.key(apply_manual_translations(text)[0]))
+        stripped = text.lstrip()
+        return text[:len(text) - len(stripped)] + translated.lstrip()
+
     # Pattern 1: Single-line comments with Chinese
     def replace_single_comment(match):
         nonlocal changes_made
-        indent = match.group(1)
-        comment_marker = match.group(2)
         comment_text = match.group(3)
-        
+
         if contains_chinese(comment_text):
-            translated = translate_text(comment_text)
+            translated = translate_span(comment_text)
+            if translated == comment_text:
+                return match.group(0)
             changes_made += 1
-            print(f"  [{changes_made}] {comment_text[:50]}... -> {translated[:50]}...")
-            return f"{indent}{comment_marker} {translated}"
+            log.append(f"  [{changes_made}] {comment_text[:50]}... -> {translated[:50]}...")
+            return match.group(1) + match.group(2) + translated
         return match.group(0)
-    
+
     # Replace single-line comments
-    content = re.sub(
-        r'^(\s*)(//|/\*\*?|\*)(.*)$',
-        replace_single_comment,
-        content,
-        flags=re.MULTILINE
-    )
-    
+    content = SINGLE_COMMENT_RE.sub(replace_single_comment, content)
+
     # Pattern 2: JSDoc @param and @returns with Chinese
     def replace_jsdoc_param(match):
         nonlocal changes_made
-        indent = match.group(1)
         param_type = match.group(2)
-        param_name = match.group(3) if match.group(3) else ""
         description = match.group(4)
-        
+
         if contains_chinese(description):
-            translated = translate_text(description)
+            translated = translate_span(description)
+            if translated == description:
+                return match.group(0)
             changes_made += 1
-            print(f"  [{changes_made}] @{param_type} {description[:40]}... -> {translated[:40]}...")
-            return f"{indent}@{param_type}{param_name} {translated}"
+            log.append(f"  [{changes_made}] @{param_type} {description[:40]}... -> {translated[:40]}...")
+            # Everything up to the description (the '@' is part of group 1) stays as it is
+            return match.group(0)[:match.start(4) - match.start(0)] + translated
         return match.group(0)
-    
+
     # Replace @param, @returns, @return descriptions
-    content = re.sub(
-        r'^(\s+\*\s*@)(param|returns?|brief|details|description)(\s+\{[^}]+\}\s+\w+)?\s+(.+)$',
-        replace_jsdoc_param,
-        content,
-        flags=re.MULTILINE
-    )
-    
+    content = JSDOC_PARAM_RE.sub(replace_jsdoc_param, content)
+
     if changes_made > 0:
-        if not DRY_RUN:
+        if not dry_run:
             # Create backup
             backup_path = str(file_path) + BACKUP_SUFFIX
             if not os.path.exists(backup_path):
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    f.write(original_content)
-                print(f"  Backup created: {backup_path}")
-            
+                atomic_write(backup_path, original_content)
+                log.append(f"  Backup created: {backup_path}")
+
             # Write translated content
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"  ✓ Saved {changes_made} translations")
+            atomic_write(file_path, content)
+            log.append(f"  ✓ Saved {changes_made} translations")
         else:
-            print(f"  [DRY RUN] Would save {changes_made} translations")
+            log.append(f"  [DRY RUN] Would save {changes_made} translations")
+    elif pending:
+        log.append(f"  No new translations, {len(pending)} comments still contain Chinese")
     else:
-        print("  No Chinese text found")
+        log.append("  No Chinese text found")
+    return changes_made, log, content, pending
+
+
+_WORKER_MEMORY = None
+
+
+def _init_worker(glossary, entries):
+    """Give a worker process the glossary and a read-only copy of the translation memory"""
+    global GLOSSARY, _WORKER_MEMORY
+    GLOSSARY = glossary
+    _WORKER_MEMORY = TranslationMemory(None)
+    _WORKER_MEMORY.entries = entries
+
+
+def _process_file_in_worker(file_path, dry_run):
+    return process_file(file_path, _WORKER_MEMORY, dry_run)
+
+
+def translate_files(js_files, memory, manifest, backend_spec=BACKEND, jobs=JOBS, batch_size=BATCH_SIZE,
+                    dry_run=DRY_RUN, force=False):
+    """Translate the comments of js_files and record them in the manifest
+
+    Files the manifest knows to be unchanged and fully translated are
+    skipped. Unchanged files with untranslated spans are scanned again so
+    the backend can retry those spans (e.g. after an offline run or a
+    network error), but are only rewritten if one of them got a translation.
+
+    Scanning and rewriting files is CPU bound, so both passes run on a pool of
+    worker processes; only the backend requests in between use threads.
+    Returns the number of files changed.
+    """
+    glossary = get_glossary()
+    changed = []
+    retry = {}
+    for js_file in js_files:
+        pending = None if force or not manifest.unchanged(js_file) else manifest.pending(js_file, glossary)
+        if pending is None:
+            changed.append(js_file)
+        elif pending:
+            retry[js_file] = pending
+    if not force:
+        print(f"{len(changed)} changed since the last run, {len(retry)} with untranslated comments")
+
+    scan = changed + sorted(retry)
+    workers = max(1, min(jobs, len(scan)))
+    chunksize = max(1, len(scan) // (workers * 4))
+
+    # Collect every fragment that needs the backend, translate each unique one once
+    fragments = set()
+    if scan:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(glossary, {})) as pool:
+            for file_fragments in pool.map(collect_fragments, scan, chunksize=chunksize):
+                fragments |= file_fragments
+    translate_fragments(fragments, memory, backend_spec, batch_size, max(1, jobs))
+    memory.save()
+
+    js_files = changed + [js_file for js_file in sorted(retry) if not retry[js_file].isdisjoint(memory.entries)]
+    files_changed = 0
+    if js_files:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(glossary, memory.entries)) as pool:
+            results = pool.map(partial(_process_file_in_worker, dry_run=dry_run), js_files, chunksize=chunksize)
+            for js_file, (changes_made, log, content, pending) in zip(js_files, results):
+                print("\n".join(log))
+                if changes_made:
+                    files_changed += 1
+                if content is not None and not dry_run:
+                    manifest.record(js_file, content, pending, glossary)
+
+    if not dry_run:
+        manifest.save()
+    return files_changed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Translate Chinese comments in dxmodules to English")
+    parser.add_argument("--path", type=Path, default=DXMODULES_PATH, help="Folder with .js files")
+    parser.add_argument("--dry-run", action="store_true", default=DRY_RUN, help="Show changes without modifying files")
+    parser.add_argument("--backend", default=BACKEND, help="google, offline or module:factory")
+    parser.add_argument("--cache", type=Path, default=CACHE_PATH, help="Translation memory file")
+    parser.add_argument("--jobs", type=int, default=JOBS, help="Number of worker processes and backend threads")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Fragments per backend request")
+    parser.add_argument("--glossary", type=Path, default=GLOSSARY_PATH, help="JSON glossary extending MANUAL_TRANSLATIONS")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH, help="Manifest of processed files")
+    parser.add_argument("--force", action="store_true", help="Process every file; the manifest is still updated")
+    parser.add_argument("--benchmark", action="store_true", help="Run the glossary micro-benchmark and exit")
+    parser.add_argument("files", nargs="*", type=Path, help="Only process these .js files (e.g. from a pre-commit hook)")
+    return parser.parse_args()
+
+
+def benchmark_glossary(glossary_sizes=(100, 1000, 10000), text_sizes=(10_000, 100_000, 300_000)):
+    """Compare the per-term str.replace scan with the single-pass trie"""
+    import random
+    import time
+
+    rng = random.Random(0)
+    alphabet = [chr(code) for code in range(0x4e00, 0x4e00 + 3000)]
+
+    def naive(terms, text):
+        for chinese, english in terms.items():
+            if chinese in text:
+                text = text.replace(chinese, english)
+        return text
+
+    print(f"{'terms':>8} {'text chars':>12} {'naive ms':>10} {'trie ms':>10} {'speedup':>8}")
+    for glossary_size in glossary_sizes:
+        terms = {}
+        while len(terms) < glossary_size:
+            term = "".join(rng.choice(alphabet) for _ in range(rng.randint(2, 6)))
+            terms[term] = f"t{len(terms)}"
+        keys = list(terms)
+        glossary = Glossary(terms)
+        for text_size in text_sizes:
+            parts = []
+            size = 0
+            while size < text_size:
+                part = rng.choice(keys) if rng.random() < 0.3 else rng.choice(alphabet) + " // "
+                parts.append(part)
+                size += len(part)
+            text = "".join(parts)
+
+            start = time.perf_counter()
+            naive(terms, text)
+            naive_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            glossary.translate(text)
+            trie_ms = (time.perf_counter() - start) * 1000
+            print(f"{glossary_size:>8} {text_size:>12} {naive_ms:>10.1f} {trie_ms:>10.1f} {naive_ms / trie_ms:>7.1f}x")
 
 
 def main():
     """Main function to process all JavaScript files in dxmodules"""
+    args = parse_args()
+    if args.benchmark:
+        benchmark_glossary()
+        return
+
+    global GLOSSARY
+    GLOSSARY = load_glossary(args.glossary)
     print("=" * 70)
     print("Chinese to English Comment Translator for dxmodules")
     print("=" * 70)
-    
-    if DRY_RUN:
+
+    if args.dry_run:
         print("\n*** DRY RUN MODE - No files will be modified ***\n")
-    
-    if not DXMODULES_PATH.exists():
-        print(f"Error: dxmodules folder not found at {DXMODULES_PATH}")
+
+    if not args.path.exists():
+        print(f"Error: dxmodules folder not found at {args.path}")
         return
-    
+
     # Find all .js files in dxmodules
-    js_files = list(DXMODULES_PATH.glob("*.js"))
-    
+    if args.files:
+        js_files = sorted(path for path in args.files if path.suffix == ".js")
+    else:
+        js_files = sorted(args.path.glob("*.js"))
+
     if not js_files:
         print("No JavaScript files found in dxmodules folder")
         return
-    
+
     print(f"\nFound {len(js_files)} JavaScript files")
-    
-    total_files_changed = 0
-    for js_file in sorted(js_files):
-        original_size = js_file.stat().st_size
-        process_file(js_file)
-        
-        if not DRY_RUN and js_file.stat().st_size != original_size:
-            total_files_changed += 1
-    
+
+    memory = TranslationMemory(args.cache)
+    manifest = Manifest(args.manifest)
+    total_files_changed = translate_files(js_files, memory, manifest, args.backend, args.jobs,
+                                          args.batch_size, args.dry_run, args.force)
+
     print("\n" + "=" * 70)
-    if DRY_RUN:
+    if args.dry_run:
         print(f"DRY RUN COMPLETE - Would modify {total_files_changed} files")
     else:
         print(f"TRANSLATION COMPLETE")